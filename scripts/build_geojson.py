@@ -0,0 +1,65 @@
+"""
+Construit l'asset GeoJSON simplifié des contours des départements.
+
+Le GeoJSON source (métropole + DOM, non simplifié) pèse plusieurs Mo ;
+pour une carte de 600 px de haut, une géométrie simplifiée est visuellement
+identique et beaucoup plus rapide à parser, transmettre et tracer.
+
+Usage:
+    uv run python scripts/build_geojson.py
+    uv run python scripts/build_geojson.py --tolerance 0.01 --source departements.geojson
+"""
+
+import argparse
+import gzip
+import json
+from pathlib import Path
+
+import geopandas as gpd
+
+# Mêmes valeurs que DEPARTEMENTS_GEOJSON_URL / DEPARTEMENTS_GEOJSON_ASSET dans
+# utils/charts.py (non importé ici pour ne pas charger Streamlit)
+DEPARTEMENTS_GEOJSON_URL = 'https://france-geojson.gregoiredavid.fr/repo/departements.geojson'
+DEPARTEMENTS_GEOJSON_ASSET = Path(__file__).resolve().parent.parent / "assets" / "departements.min.geojson.gz"
+
+
+def build_geojson(source: str, output: Path, tolerance: float) -> Path:
+    """
+    Simplifie les contours et les écrit en GeoJSON compressé (gzip).
+    
+    Args:
+        source: URL ou chemin du GeoJSON d'origine
+        output: Fichier .geojson.gz à écrire
+        tolerance: Tolérance de simplification (en degrés)
+        
+    Returns:
+        Chemin du fichier écrit
+    """
+    gdf = gpd.read_file(source)
+    gdf['geometry'] = gdf.geometry.simplify(tolerance, preserve_topology=True)
+    
+    geojson = json.loads(gdf.to_json(drop_id=True))
+    
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(output, 'wt', encoding='utf-8') as f:
+        json.dump(geojson, f, separators=(',', ':'))
+    
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--source', default=DEPARTEMENTS_GEOJSON_URL,
+                        help="URL ou chemin du GeoJSON d'origine")
+    parser.add_argument('--output', type=Path, default=DEPARTEMENTS_GEOJSON_ASSET,
+                        help="Fichier .geojson.gz à écrire")
+    parser.add_argument('--tolerance', type=float, default=0.005,
+                        help="Tolérance de simplification en degrés (défaut: 0.005)")
+    args = parser.parse_args()
+    
+    output = build_geojson(args.source, args.output, args.tolerance)
+    print(f"GeoJSON simplifié écrit dans {output} ({output.stat().st_size / 1024:.0f} Ko)")
+
+
+if __name__ == "__main__":
+    main()
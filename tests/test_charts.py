@@ -0,0 +1,118 @@
+"""Tests du module utils.charts."""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from utils import charts
+
+
+def _evolution(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'annee': np.arange(n),
+        'total_faits': np.arange(n, dtype=np.int64) * 3 + 10
+    })
+
+
+def test_temporal_chart_switches_to_webgl_above_threshold():
+    small = charts.create_temporal_evolution_chart(_evolution(10))
+    large = charts.create_temporal_evolution_chart(_evolution(charts.WEBGL_THRESHOLD + 1))
+
+    assert all(isinstance(trace, go.Scatter) for trace in small.data)
+    assert all(isinstance(trace, go.Scattergl) for trace in large.data)
+
+
+class _FakeResampler(go.Figure):
+    """Remplace FigureResampler : garde un point sur dix."""
+
+    def __init__(self, figure=None, default_n_shown_samples=1000):
+        super().__init__(figure)
+
+    def add_trace(self, trace, hf_x=None, hf_y=None, **kwargs):
+        return super().add_trace(trace.update(x=hf_x[::10], y=hf_y[::10]))
+
+
+def test_temporal_chart_resamples_long_series(monkeypatch):
+    monkeypatch.setattr(charts, "RESAMPLER_AVAILABLE", True)
+    monkeypatch.setattr(charts, "FigureResampler", _FakeResampler, raising=False)
+    charts.create_temporal_evolution_chart.clear()
+
+    fig = charts.create_temporal_evolution_chart(_evolution(charts.RESAMPLE_THRESHOLD + 10))
+
+    assert type(fig) is go.Figure
+    assert [len(trace.x) for trace in fig.data] == [(charts.RESAMPLE_THRESHOLD + 10) // 10] * 2
+
+
+def test_temporal_chart_trendline_matches_polyfit():
+    df = pd.DataFrame({'annee': np.arange(2016, 2024), 'total_faits': [5, 9, 4, 12, 15, 11, 20, 18]})
+
+    fig = charts.create_temporal_evolution_chart(df)
+
+    expected = np.poly1d(np.polyfit(np.arange(len(df)), df['total_faits'], 1))(np.arange(len(df)))
+    np.testing.assert_allclose(fig.data[1].y, expected)
+
+
+def test_normalize_dept_codes():
+    codes = pd.Series([1, 75, None, 1], dtype='category')
+
+    normalized = charts._normalize_dept_codes(codes)
+
+    assert normalized.iloc[[0, 1, 3]].tolist() == ['01', '75', '01']
+    assert pd.isna(normalized.iloc[2])
+    assert charts._normalize_dept_codes(pd.Series(['2A', '971'])).tolist() == ['2A', '971']
+
+
+def test_heatmap_pivot_matches_pivot_table():
+    df = pd.DataFrame({
+        'classe': pd.Categorical(['Vols', 'Vols', 'Coups', 'Vols'], categories=['Coups', 'Vols', 'Autre']),
+        'annee': [2020, 2021, 2021, 2020],
+        'faits': [3, 4, 5, 6],
+    })
+
+    fig = charts.create_heatmap(df, x_column='annee', y_column='classe', value_column='faits')
+
+    expected = df.pivot_table(index='classe', columns='annee', values='faits',
+                              aggfunc='sum', observed=True, fill_value=0)
+    np.testing.assert_array_equal(fig.data[0].z, expected.to_numpy())
+    assert list(fig.data[0].y) == ['Coups', 'Vols']
+
+
+def test_shrink_downcasts_numeric_columns():
+    df = pd.DataFrame({'total_faits': np.array([1, 70_000], dtype=np.int64),
+                       'pourcentage': [12.5, 87.5], 'departement': ['Ain', 'Nord']})
+
+    shrunk = charts._shrink(df)
+
+    assert shrunk.dtypes.to_dict() == {'total_faits': np.int32, 'pourcentage': np.float32,
+                                      'departement': object}
+    assert shrunk['total_faits'].tolist() == [1, 70_000]
+    assert df['total_faits'].dtype == np.int64
+
+
+def test_choropleth_only_embeds_present_departements(monkeypatch):
+    features = {code: {'type': 'Feature', 'properties': {'code': code}, 'geometry': None}
+                for code in ['01', '13', '75']}
+    monkeypatch.setattr(charts, "_departements_by_code", lambda: features)
+    charts.create_choropleth_map.clear()
+    df = pd.DataFrame({'code_dept': [75, 1, 99], 'total_faits': [10, 20, 30]})
+
+    fig = charts.create_choropleth_map(df)
+
+    assert [f['properties']['code'] for f in fig.data[0].geojson['features']] == ['75', '01']
+
+
+def test_heatmap_cache_tells_large_frames_apart():
+    n = 60_000
+    first = pd.DataFrame({'classe': np.where(np.arange(n) % 2, 'Vols', 'Coups'),
+                          'annee': 2020 + np.arange(n) % 4, 'faits': np.ones(n, dtype=np.int64)})
+    # Modifier les lignes que l'échantillon de hachage par défaut de Streamlit ignore
+    unsampled = first.index.difference(first.sample(n=10_000, random_state=0).index)
+    second = first.copy()
+    second.loc[unsampled, 'faits'] = 2
+
+    z_first = charts.create_heatmap(first, x_column='annee', y_column='classe', value_column='faits').data[0].z
+    z_second = charts.create_heatmap(second, x_column='annee', y_column='classe', value_column='faits').data[0].z
+
+    assert np.asarray(z_first).sum() == n
+    assert np.asarray(z_second).sum() == 2 * n - 10_000
@@ -0,0 +1,190 @@
+"""Tests du module utils.chatbot."""
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from utils import chatbot
+from utils.chatbot import CrimeAnalysisBot
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+@pytest.fixture
+def bot():
+    return CrimeAnalysisBot()
+
+
+def test_answer_question_stream_yields_chunks_and_records_history(bot, monkeypatch):
+    calls = []
+
+    def fake_completion(**kwargs):
+        calls.append(kwargs)
+        return iter([_chunk("Hausse "), _chunk(None), _chunk("de 3 %")])
+
+    monkeypatch.setattr(chatbot, "LITELLM_AVAILABLE", True)
+    monkeypatch.setattr(chatbot, "completion", fake_completion, raising=False)
+
+    parts = list(bot.answer_question_stream("Tendance ?", "Période: 2016 - 2023"))
+
+    assert parts == ["Hausse ", "de 3 %"]
+    assert calls[0]["stream"] is True
+    assert bot.conversation_history[-1] == {"role": "assistant", "content": "Hausse de 3 %"}
+
+
+def test_answer_question_stream_without_litellm(bot, monkeypatch):
+    monkeypatch.setattr(chatbot, "LITELLM_AVAILABLE", False)
+
+    parts = list(bot.answer_question_stream("Quelle tendance ?", ""))
+
+    assert parts == [bot._generate_fallback_response("Quelle tendance ?")]
+
+
+def test_get_data_summary_from_month_columns():
+    df = pd.DataFrame({
+        'annee': [2020, 2022],
+        'code_dept': ['75', '13'],
+        '1': [3, None],
+        '2': [4, 5],
+    })
+
+    assert chatbot.get_data_summary(df) == "Période: 2020 - 2022 | Départements: 2 | Total des faits: 12"
+
+
+def test_analyze_trends_stream_opt_in(bot, monkeypatch):
+    monkeypatch.setattr(chatbot, "LITELLM_AVAILABLE", False)
+    df = pd.DataFrame({'annee': [2020, 2021], 'faits': [10, 12], 'code_dept': ['75', '75']})
+
+    assert isinstance(bot.analyze_trends(df), str)
+    assert "".join(bot.analyze_trends(df, stream=True)) == bot.analyze_trends(df)
+
+
+def test_generate_response_reuses_cached_completion(bot, monkeypatch):
+    calls = []
+
+    def fake_completion(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content="Réponse")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(chatbot, "LITELLM_AVAILABLE", True)
+    monkeypatch.setattr(chatbot, "completion", fake_completion, raising=False)
+    chatbot._cached_completion.clear()
+
+    first = bot.generate_response("Question ?", context="Période: 2016 - 2023")
+    second = bot.generate_response("Question ?", context="Période: 2016 - 2023")
+    bot.generate_response("Question ?", context="Période: 2020 - 2023")
+
+    assert first == second == "Réponse"
+    assert len(calls) == 2
+
+
+def test_generate_response_tries_fallback_model_once(bot, monkeypatch):
+    calls = []
+
+    def failing_completion(**kwargs):
+        calls.append(kwargs["model"])
+        raise RuntimeError("API indisponible")
+
+    errors = []
+    monkeypatch.setattr(chatbot, "LITELLM_AVAILABLE", True)
+    monkeypatch.setattr(chatbot, "completion", failing_completion, raising=False)
+    monkeypatch.setattr(chatbot.st, "error", errors.append)
+    chatbot._cached_completion.clear()
+
+    answer = bot.generate_response("Quelle tendance ?", model="gpt-4o")
+
+    assert calls == ["gpt-4o", bot.fallback_model]
+    assert len(errors) == 1
+    assert answer == bot._generate_fallback_response("Quelle tendance ?")
+    assert list(bot.conversation_history) == []
+
+
+@pytest.mark.parametrize("prompt, key", [
+    ("Quelle est la TENDANCE à Paris ?", "tendance"),
+    ("Faites une comparaison 75/13", "comparaison"),
+    ("Pourquoi cette diminution ?", "diminution"),
+])
+def test_fallback_response_matches_keyword(bot, prompt, key):
+    assert bot._generate_fallback_response(prompt) == chatbot._FALLBACK_RESPONSES[key]
+
+
+def test_fallback_response_default(bot):
+    assert bot._generate_fallback_response("Bonjour") == chatbot._DEFAULT_FALLBACK_RESPONSE
+
+
+def test_get_available_models_follows_environment(bot, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "your_anthropic_key_here")
+    assert bot.get_available_models() == [bot.default_model]
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    models = bot.get_available_models()
+    assert models[0] == "gpt-5-nano" and "claude-3-haiku-20240307" not in models
+
+
+def test_analyze_trends_first_and_last_year(bot, monkeypatch):
+    contexts = []
+    monkeypatch.setattr(bot, "generate_response", lambda prompt, context=None: contexts.append(context))
+    df = pd.DataFrame({'annee': [2021, 2019, 2020, 2021], 'faits': [6, 10, 99, 9], 'code_dept': ['75'] * 4})
+
+    bot.analyze_trends(df)
+    bot.analyze_trends(df.assign(faits=[6, 0, 99, 9]))
+
+    assert contexts[0].endswith("Évolution totale: 50.0%")
+    assert contexts[1] == "Données nationales"
+
+
+def test_conversation_history_is_bounded(bot, monkeypatch):
+    monkeypatch.setattr(bot, "conversation_history", chatbot.deque(maxlen=4))
+
+    for i in range(5):
+        bot._remember("user", f"question {i}")
+
+    assert [m["content"] for m in bot.conversation_history] == [f"question {i}" for i in range(1, 5)]
+
+    long_answer = "x" * 4 * (chatbot.CHAT_HISTORY_MAX_TOKENS - 1)
+    bot._remember("assistant", long_answer)
+    assert [m["content"] for m in bot.conversation_history] == [long_answer]
+    assert bot._history_tokens == chatbot.CHAT_HISTORY_MAX_TOKENS - 1
+
+    bot.clear_history()
+    assert len(bot.conversation_history) == 0 and bot._history_tokens == 0
+
+
+def test_answer_question_stream_recovers_from_mid_stream_error(bot, monkeypatch):
+    def broken_stream():
+        yield _chunk("Hausse ")
+        raise RuntimeError("quota dépassé")
+
+    def fake_completion(**kwargs):
+        if kwargs.get("stream"):
+            return broken_stream()
+        message = SimpleNamespace(content="Réponse de secours")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(chatbot, "LITELLM_AVAILABLE", True)
+    monkeypatch.setattr(chatbot, "completion", fake_completion, raising=False)
+    chatbot._cached_completion.clear()
+
+    parts = list(bot.answer_question_stream("Tendance ?", "Période: 2016 - 2023"))
+
+    assert parts == ["Hausse ", "\n\n", "Réponse de secours"]
+    assert list(bot.conversation_history)[-1] == {"role": "assistant", "content": "".join(parts)}
+
+
+def test_stream_with_fallback_model_failing_yields_canned_answer(bot, monkeypatch):
+    errors = []
+    monkeypatch.setattr(chatbot, "LITELLM_AVAILABLE", True)
+    monkeypatch.setattr(chatbot, "completion", lambda **kwargs: 1 / 0, raising=False)
+    monkeypatch.setattr(chatbot.st, "error", errors.append)
+    chatbot._cached_completion.clear()
+
+    parts = list(bot.generate_response_stream("Quelle tendance ?", model=bot.fallback_model))
+
+    assert parts == [bot._generate_fallback_response("Quelle tendance ?")]
+    assert len(errors) == 1
+    assert len(bot.conversation_history) == 2
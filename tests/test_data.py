@@ -0,0 +1,253 @@
+"""Tests du module utils.data."""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from utils import data
+from utils.data import DataLoader
+
+
+@pytest.fixture
+def loader(tmp_path):
+    return DataLoader(data_dir=str(tmp_path))
+
+
+def _month_frame(values: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(values, columns=[f"{m:02d}" for m in range(1, values.shape[1] + 1)])
+    df['code_dept'] = '75'
+    return df
+
+
+@pytest.mark.parametrize("numba_enabled", [True, False])
+def test_add_faits_column_backends_agree(loader, monkeypatch, numba_enabled):
+    if numba_enabled and not data.NUMBA_AVAILABLE:
+        pytest.skip("numba non installé")
+    monkeypatch.setattr(data, "NUMBA_AVAILABLE", numba_enabled)
+
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 500, size=(1000, 12), dtype=np.int32)
+
+    df = loader._add_faits_column(_month_frame(values))
+
+    np.testing.assert_array_equal(df['faits'].to_numpy(), values.sum(axis=1))
+    assert df['faits'].dtype == np.int32
+
+
+@pytest.mark.parametrize("numba_enabled", [True, False])
+def test_add_faits_column_keeps_int64_on_overflow(loader, monkeypatch, numba_enabled):
+    if numba_enabled and not data.NUMBA_AVAILABLE:
+        pytest.skip("numba non installé")
+    monkeypatch.setattr(data, "NUMBA_AVAILABLE", numba_enabled)
+
+    big = np.iinfo(np.int32).max
+    values = np.array([[big, big], [1, 2]], dtype=np.int32)
+
+    df = loader._add_faits_column(_month_frame(values))
+
+    assert df['faits'].dtype == np.int64
+    assert df['faits'].tolist() == [2 * big, 3]
+
+
+@pytest.mark.parametrize("dtype", ["category", "object"])
+def test_get_population_matches_dict_lookup(dtype):
+    codes = pd.Series(['75', '2A', '13', '75', '971'], dtype=dtype)
+
+    expected = codes.astype(str).map(data.load_population_data()).astype('float64')
+
+    np.testing.assert_array_equal(data.get_population(codes), expected.to_numpy())
+
+
+@pytest.fixture
+def crimes(loader):
+    return loader._downcast_dtypes(loader._create_demo_data())
+
+
+def test_stats_derived_from_cube_match_direct_groupby(loader, crimes):
+    dept_stats = loader.get_department_stats(crimes).set_index('code_dept')
+    expected = crimes.groupby('code_dept', observed=True)['faits'].agg(['sum', 'size'])
+    pd.testing.assert_series_equal(
+        dept_stats['total_faits'].sort_index(), expected['sum'].sort_index(),
+        check_names=False, check_dtype=False
+    )
+    assert (dept_stats['nb_enregistrements'].sort_index() == expected['size'].sort_index()).all()
+
+    dept = crimes['code_dept'].iloc[0]
+    evolution = loader.get_temporal_evolution(crimes, dept_code=dept)
+    expected = crimes[crimes['code_dept'] == dept].groupby('annee')['faits'].sum()
+    assert evolution['total_faits'].tolist() == expected.tolist()
+
+    year = int(crimes['annee'].iloc[0])
+    distribution = loader.get_crime_types_distribution(crimes, year=year)
+    assert distribution['total'].sum() == crimes.loc[crimes['annee'] == year, 'faits'].sum()
+
+    top = loader.get_top_departments(crimes, n=3)
+    expected = crimes.groupby('code_dept', observed=True)['faits'].sum().nlargest(3)
+    assert top['total_faits'].tolist() == expected.tolist()
+
+
+def test_unique_sorted_ignores_unused_categories():
+    values = pd.Series(['Nord', 'Ain', None, 'Nord', 'Rhône'], dtype='category')
+
+    assert data.unique_sorted(values) == ['Ain', 'Nord', 'Rhône']
+    assert data.unique_sorted(values[values != 'Ain']) == ['Nord', 'Rhône']
+    assert data.unique_sorted(values.astype(object)) == ['Ain', 'Nord', 'Rhône']
+
+
+def test_hash_dataframe_sees_every_row():
+    df = pd.DataFrame({'faits': np.arange(10_000)})
+    changed = df.copy()
+    changed.loc[5_000, 'faits'] = -1
+
+    assert data._hash_dataframe(df) == data._hash_dataframe(df.copy())
+    assert data._hash_dataframe(df) != data._hash_dataframe(changed)
+
+
+@pytest.mark.parametrize("numba_enabled", [True, False])
+def test_add_faits_column_treats_missing_months_as_zero(loader, monkeypatch, numba_enabled):
+    if numba_enabled and not data.NUMBA_AVAILABLE:
+        pytest.skip("numba non installé")
+    monkeypatch.setattr(data, "NUMBA_AVAILABLE", numba_enabled)
+
+    df = _month_frame(np.array([[3.0, np.nan], [np.nan, 5.0]]))
+
+    assert loader._add_faits_column(df)['faits'].tolist() == [3, 5]
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        return iter(self.chunks)
+
+
+def test_download_streams_to_disk_and_reads_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(data.requests, "get", lambda url, **kwargs: _FakeStream(
+        [b"Code d\xc3\xa9partement;Service;annee;faits\n", b"01;CSP;2020;3\n", b"13;BRI;2021;4\n"]
+    ))
+    cache_file = tmp_path / "crime_data.csv"
+
+    data._download("https://example.invalid/crimes.csv", cache_file)
+
+    assert [p.name for p in tmp_path.iterdir()] == ["crime_data.csv"]
+    df = data._read_cached_csv(cache_file)
+    assert df.columns.tolist() == ["Code département", "annee", "faits"]
+    assert df["faits"].tolist() == [3, 4]
+    # Codes lus comme libellés catégoriels : le zéro initial est conservé
+    assert df["Code département"].tolist() == ["01", "13"]
+    assert isinstance(df["Code département"].dtype, pd.CategoricalDtype)
+
+    # Ancien format de cache (to_csv, séparateur virgule)
+    df.to_csv(cache_file, index=False)
+    pd.testing.assert_frame_equal(data._read_cached_csv(cache_file), df)
+
+
+def test_clean_crime_data_stores_faits(loader):
+    raw = pd.DataFrame({
+        'Code département': ['75', '13', None],
+        'Millésime': ['2020', '2021', '2021'],
+        'Classe': ['Vols', 'Coups', 'Vols'],
+        '01': [1, 2, 3],
+        '02': [4, None, 6],
+    })
+
+    cleaned = loader._clean_crime_data(raw)
+
+    assert cleaned['faits'].tolist() == [5, 2]
+
+
+def test_crime_types_distribution_with_both_filters(loader, crimes):
+    dept = crimes['code_dept'].iloc[0]
+    year = int(crimes['annee'].iloc[0])
+
+    distribution = loader.get_crime_types_distribution(crimes, dept_code=dept, year=year)
+
+    selected = crimes[(crimes['code_dept'] == dept) & (crimes['annee'] == year)]
+    assert distribution['total'].sum() == selected['faits'].sum()
+
+
+def test_temporal_evolution_pct_matches_pct_change(loader):
+    crimes = pd.DataFrame({'code_dept': '75', 'annee': [2019, 2020, 2021, 2022], 'faits': [10, 0, 5, 8]})
+
+    evolution = loader.get_temporal_evolution(crimes)
+
+    expected = evolution['total_faits'].pct_change() * 100
+    pd.testing.assert_series_equal(evolution['evolution_pct'], expected, check_names=False)
+
+
+def test_crime_rates_match_scalar_formula():
+    stats = pd.DataFrame({'code_dept': pd.Categorical(['75', '13', '2A']), 'total_faits': [2165, 4080, 12]})
+
+    population = data.load_population_data()
+    expected = [data.calculate_crime_rate(total, population.get(code, 0))
+                for code, total in zip(stats['code_dept'], stats['total_faits'])]
+
+    np.testing.assert_allclose(data.crime_rates(stats), expected)
+    assert data.load_population_data() is population
+
+
+def test_csv_cache_converted_chunk_by_chunk(loader, monkeypatch):
+    monkeypatch.setattr(data, "CSV_CHUNK_SIZE", 2)
+    (loader.data_dir / "crime_data.csv").write_text(
+        "Code département;Département;Classe;Millésime;01;02\n"
+        "01;Ain;Vols;2020;1;2\n"
+        "75;Paris;Coups;2020;3;\n"
+        ";Inconnu;Vols;2021;5;5\n"
+        "2A;Corse-du-Sud;Vols;2021;4;4\n",
+        encoding="utf-8"
+    )
+
+    df = loader.load_crime_data()
+
+    totals = df.groupby('code_dept', observed=True)['faits'].sum().to_dict()
+    assert totals == {'01': 3, '75': 3, '2A': 8}
+    # 'faits' est stocké dans le Parquet : les colonnes de mois ne sont pas relues
+    assert sorted(df.columns) == sorted(data.CRIME_COLUMNS)
+    stored = loader._get_dataset().schema
+    assert sorted(stored.names) == sorted(data.CRIME_COLUMNS)
+    assert stored.field('faits').type == pa.int64()
+
+
+def test_calculate_crime_rate_scalar_and_array():
+    assert data.calculate_crime_rate(50, 10_000) == 5.0
+    assert data.calculate_crime_rate(50, 0) == 0
+
+    rates = data.calculate_crime_rate(np.array([50, 7, 3]), np.array([10_000, 0, 1_000]))
+    np.testing.assert_array_equal(rates, [5.0, 0.0, 3.0])
+
+
+def test_demo_data_covers_every_combination(loader):
+    demo = loader._create_demo_data()
+
+    assert len(demo) == 5 * 9 * 5
+    assert not demo.duplicated(['code_dept', 'annee', 'classe']).any()
+    assert demo.groupby('code_dept')['departement'].nunique().eq(1).all()
+    assert demo.iloc[0][['code_dept', 'annee']].tolist() == ['75', 2019]
+    assert demo['faits'].between(100, 4999).all()
+
+
+def test_interrupted_conversion_leaves_no_dataset(loader, crimes):
+    def chunks():
+        yield crimes
+        raise RuntimeError("conversion interrompue")
+
+    with pytest.raises(RuntimeError):
+        loader.to_parquet(chunks())
+
+    assert list(loader.data_dir.iterdir()) == []
+
+    loader.to_parquet(crimes)
+    loader.to_parquet(crimes.head(3))
+    assert loader.load_crime_data()['faits'].sum() == crimes.head(3)['faits'].sum()
+    assert [p.name for p in loader.data_dir.iterdir()] == ["crime_data.parquet"]
@@ -1,6 +1,6 @@
 """Fichier d'initialisation du package utils."""
 
-from .data import DataLoader, load_population_data, calculate_crime_rate
+from .data import DataLoader, load_population_data, get_population, crime_rates, calculate_crime_rate, unique_sorted
 from .charts import (
     create_choropleth_map,
     create_temporal_evolution_chart,
@@ -8,14 +8,18 @@ from .charts import (
     create_bar_chart,
     create_comparison_chart,
     create_heatmap,
-    create_statistics_cards
+    create_statistics_cards,
+    STAT_CARDS_CSS
 )
 from .chatbot import CrimeAnalysisBot, get_data_summary
 
 __all__ = [
     'DataLoader',
     'load_population_data',
+    'get_population',
+    'crime_rates',
     'calculate_crime_rate',
+    'unique_sorted',
     'create_choropleth_map',
     'create_temporal_evolution_chart',
     'create_crime_types_pie_chart',
@@ -23,6 +27,7 @@ __all__ = [
     'create_comparison_chart',
     'create_heatmap',
     'create_statistics_cards',
+    'STAT_CARDS_CSS',
     'CrimeAnalysisBot',
     'get_data_summary'
 ]
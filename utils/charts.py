@@ -1,13 +1,117 @@
 """Module pour la création de visualisations interactives."""
 
+import gzip
+import json
+from pathlib import Path
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import pandas as pd
 import folium
-from typing import Optional, List
+from folium.plugins import FastMarkerCluster
+import requests
+from typing import Optional, List, Union
 import streamlit as st
 
+from .data import _DF_HASH
+
+# Import plotly-resampler (optionnel) pour sous-échantillonner les longues séries
+try:
+    from plotly_resampler import FigureResampler
+    RESAMPLER_AVAILABLE = True
+except ImportError:
+    RESAMPLER_AVAILABLE = False
+
+# Import orjson (optionnel) : sérialisation JSON des figures plus rapide
+# (st.plotly_chart passe par plotly.io.to_json)
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = "orjson"
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Contours des départements (GeoJSON)
+DEPARTEMENTS_GEOJSON_URL = 'https://france-geojson.gregoiredavid.fr/repo/departements.geojson'
+
+# Au-delà de ce nombre de points, les courbes sont tracées en WebGL (Scattergl)
+WEBGL_THRESHOLD = 5000
+
+# Au-delà de ce nombre de points, les séries sont sous-échantillonnées (plotly-resampler)
+RESAMPLE_THRESHOLD = 5000
+RESAMPLE_N_SAMPLES = 2000
+
+# Version simplifiée et compressée, générée par scripts/build_geojson.py
+DEPARTEMENTS_GEOJSON_ASSET = Path(__file__).resolve().parent.parent / "assets" / "departements.min.geojson.gz"
+
+# Styles des cartes de statistiques, à inclure une fois dans le CSS de la page
+STAT_CARDS_CSS = """
+    .stat-cards { display: flex; gap: 20px; margin: 20px 0; }
+    .stat-card { flex: 1; padding: 20px; border-radius: 10px; color: white; }
+    .stat-card h3 { margin: 0; padding: 0; font-size: 16px; opacity: 0.9; color: white; }
+    .stat-card p { margin: 10px 0 0 0; font-size: 32px; font-weight: bold; }
+    .stat-card p.stat-label { font-size: 18px; }
+    .stat-card p.stat-pct { margin-top: 5px; font-size: 24px; }
+    .grad-a { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); }
+    .grad-b { background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); }
+    .grad-c { background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); }
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def _load_departements_geojson() -> Union[dict, str]:
+    """
+    Charge une seule fois les contours des départements.
+    
+    L'asset local simplifié est utilisé s'il a été généré ; sinon le GeoJSON
+    complet est téléchargé.
+    
+    Returns:
+        GeoJSON parsé, ou l'URL si le téléchargement échoue
+        (le navigateur la chargera alors lui-même)
+    """
+    if DEPARTEMENTS_GEOJSON_ASSET.exists():
+        with gzip.open(DEPARTEMENTS_GEOJSON_ASSET, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    
+    try:
+        response = requests.get(DEPARTEMENTS_GEOJSON_URL, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except (requests.RequestException, ValueError):
+        return DEPARTEMENTS_GEOJSON_URL
+
 
+@st.cache_resource(show_spinner=False)
+def _departements_by_code() -> Optional[dict]:
+    """
+    Indexe les contours des départements par code.
+    
+    Returns:
+        Dictionnaire code -> feature GeoJSON, ou None si seule l'URL est disponible
+    """
+    geojson = _load_departements_geojson()
+    if isinstance(geojson, str):
+        return None
+    return {feature['properties']['code']: feature for feature in geojson['features']}
+
+
+def _departements_geojson(codes: pd.Series) -> Union[dict, str]:
+    """
+    Contours restreints aux départements présents dans les données.
+    
+    Seules ces features sont envoyées au navigateur (une vue filtrée sur
+    quelques départements n'embarque pas toute la France).
+    """
+    by_code = _departements_by_code()
+    if by_code is None:
+        return DEPARTEMENTS_GEOJSON_URL
+    features = [by_code[code] for code in pd.unique(codes.dropna()) if code in by_code]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def create_choropleth_map(df: pd.DataFrame, 
                           value_column: str = 'total_faits',
                           title: str = "Carte de la criminalité par département") -> go.Figure:
@@ -22,17 +126,18 @@ def create_choropleth_map(df: pd.DataFrame,
     Returns:
         Figure Plotly
     """
-    # Préparer les données pour la carte
-    df_map = df.copy()
+    # Préparer les données pour la carte (seules les colonnes utilisées sont copiées)
+    df_map = df[[col for col in ('code_dept', 'departement', value_column) if col in df.columns]]
     
     # Assurer que le code département est en format string à 2 chiffres
     if 'code_dept' in df_map.columns:
-        df_map['code_dept'] = df_map['code_dept'].astype(str).str.zfill(2)
+        df_map = df_map.assign(code_dept=_normalize_dept_codes(df_map['code_dept']))
+    df_map = _shrink(df_map)
     
     fig = px.choropleth(
         df_map,
         locations='code_dept',
-        geojson='https://france-geojson.gregoiredavid.fr/repo/departements.geojson',
+        geojson=_departements_geojson(df_map['code_dept']),
         featureidkey='properties.code',
         color=value_column,
         hover_name='departement' if 'departement' in df_map.columns else None,
@@ -55,6 +160,36 @@ def create_choropleth_map(df: pd.DataFrame,
     return fig
 
 
+def _shrink(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Réduit les colonnes int64/float64 au plus petit type suffisant.
+    
+    Plotly transmet les tableaux NumPy en binaire : des colonnes 32 bits
+    divisent par deux le volume envoyé au navigateur.
+    """
+    downcast = {}
+    for col in df.select_dtypes(include='int64').columns:
+        downcast[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes(include='float64').columns:
+        downcast[col] = pd.to_numeric(df[col], downcast='float')
+    return df.assign(**downcast) if downcast else df
+
+
+def _normalize_dept_codes(codes: pd.Series) -> pd.Series:
+    """
+    Met les codes département au format texte sur 2 caractères ('1' -> '01').
+    
+    Le formatage est fait une fois par code distinct, puis propagé aux
+    lignes par les codes catégoriels.
+    """
+    codes = codes.astype('category')
+    labels = codes.cat.categories.astype(str).str.zfill(2).to_numpy(dtype=object)
+    
+    # Code catégoriel -1 (valeur manquante) -> NaN ajouté en fin de tableau
+    return pd.Series(np.append(labels, np.nan)[codes.cat.codes.to_numpy()], index=codes.index)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def create_temporal_evolution_chart(df: pd.DataFrame,
                                     x_column: str = 'annee',
                                     y_column: str = 'total_faits',
@@ -71,28 +206,41 @@ def create_temporal_evolution_chart(df: pd.DataFrame,
     Returns:
         Figure Plotly
     """
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=df[x_column],
-        y=df[y_column],
+    # Tableaux NumPy : Plotly les transmet en base64 (typed arrays)
+    x_values = df[x_column].to_numpy()
+    n = x_values.size
+    y_values = df[y_column].to_numpy(dtype=np.float64)
+    # La régression se fait en float64, les valeurs tracées en 32 bits
+    y_plot = _shrink(df[[y_column]])[y_column].to_numpy()
+    
+    # Rendu SVG pour les petites séries, WebGL (GPU) pour les longues
+    scatter = go.Scattergl if n > WEBGL_THRESHOLD else go.Scatter
+    resample = RESAMPLER_AVAILABLE and n > RESAMPLE_THRESHOLD
+    
+    if resample:
+        fig = FigureResampler(go.Figure(), default_n_shown_samples=RESAMPLE_N_SAMPLES)
+    else:
+        fig = go.Figure()
+    
+    _add_series(fig, scatter(
         mode='lines+markers',
         name='Total des faits',
         line=dict(color='#d62728', width=3),
         marker=dict(size=8)
-    ))
+    ), x_values, y_plot, resample)
     
     # Ajouter une ligne de tendance
-    if len(df) > 1:
-        z = np.polyfit(range(len(df)), df[y_column], 1)
-        p = np.poly1d(z)
-        fig.add_trace(go.Scatter(
-            x=df[x_column],
-            y=p(range(len(df))),
+    if n > 1:
+        # Régression linéaire sur le rang (forme fermée, sans matrice de Vandermonde)
+        x_centered = np.arange(n, dtype=np.float64)
+        x_centered -= x_centered.mean()
+        y_mean = y_values.mean()
+        slope = np.dot(x_centered, y_values - y_mean) / np.dot(x_centered, x_centered)
+        _add_series(fig, scatter(
             mode='lines',
             name='Tendance',
             line=dict(color='#1f77b4', width=2, dash='dash')
-        ))
+        ), x_values, (y_mean + slope * x_centered).astype(np.float32), resample)
     
     fig.update_layout(
         title=title,
@@ -102,9 +250,20 @@ def create_temporal_evolution_chart(df: pd.DataFrame,
         height=400
     )
     
-    return fig
+    # Sous Streamlit, pas de serveur Dash pour ré-échantillonner au zoom :
+    # on renvoie une figure standard contenant les points agrégés
+    return go.Figure(fig) if resample else fig
+
 
+def _add_series(fig: go.Figure, trace, x: np.ndarray, y: np.ndarray, resample: bool):
+    """Ajoute une trace, en passant les données à plotly-resampler si besoin."""
+    if resample:
+        fig.add_trace(trace, hf_x=x, hf_y=y)
+    else:
+        fig.add_trace(trace.update(x=x, y=y))
 
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def create_crime_types_pie_chart(df: pd.DataFrame,
                                  labels_column: str = 'type_crime',
                                  values_column: str = 'total',
@@ -122,7 +281,7 @@ def create_crime_types_pie_chart(df: pd.DataFrame,
         Figure Plotly
     """
     # Prendre seulement les 10 premiers types
-    df_top = df.head(10)
+    df_top = _shrink(df.head(10))
     
     fig = px.pie(
         df_top,
@@ -153,6 +312,7 @@ def create_crime_types_pie_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def create_bar_chart(df: pd.DataFrame,
                      x_column: str,
                      y_column: str,
@@ -174,7 +334,7 @@ def create_bar_chart(df: pd.DataFrame,
         Figure Plotly
     """
     fig = px.bar(
-        df,
+        _shrink(df),
         x=x_column if orientation == 'v' else y_column,
         y=y_column if orientation == 'v' else x_column,
         color=color_column,
@@ -193,6 +353,7 @@ def create_bar_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def create_comparison_chart(df: pd.DataFrame,
                             departments: List[str],
                             metric: str = 'total_faits',
@@ -209,7 +370,10 @@ def create_comparison_chart(df: pd.DataFrame,
     Returns:
         Figure Plotly
     """
-    df_filtered = df[df['code_dept'].isin(departments)]
+    # Ne copier que les colonnes tracées ; code_dept est catégorielle,
+    # isin ne compare que les catégories
+    mask = df['code_dept'].isin(departments)
+    df_filtered = _shrink(df.loc[mask, ['departement', 'code_dept', metric]])
     
     fig = px.bar(
         df_filtered,
@@ -231,6 +395,25 @@ def create_comparison_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(persist="disk", max_entries=32, show_spinner=False, hash_funcs=_DF_HASH)
+def _pivot(df: pd.DataFrame, x_column: str, y_column: str, value_column: str) -> pd.DataFrame:
+    """
+    Somme value_column par (y_column, x_column), au format matrice.
+    
+    Persisté sur disque : la matrice survit aux redémarrages de l'application.
+    groupby + unstack évite la gestion des marges et des NaN de pivot_table.
+    
+    Returns:
+        DataFrame (index = y, colonnes = x), cases vides à 0
+    """
+    return (
+        df.groupby([y_column, x_column], observed=True, sort=True)[value_column]
+        .sum()
+        .unstack(x_column, fill_value=0)
+    )
+
+
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs=_DF_HASH)
 def create_heatmap(df: pd.DataFrame,
                    x_column: str,
                    y_column: str,
@@ -240,7 +423,8 @@ def create_heatmap(df: pd.DataFrame,
     Crée une heatmap.
     
     Args:
-        df: DataFrame avec les données
+        df: DataFrame au format long (idéalement déjà agrégé, ex. le cube
+            de DataLoader.get_all_stats)
         x_column: Colonne pour l'axe X
         y_column: Colonne pour l'axe Y
         value_column: Colonne pour les valeurs
@@ -249,18 +433,12 @@ def create_heatmap(df: pd.DataFrame,
     Returns:
         Figure Plotly
     """
-    # Pivoter les données pour la heatmap
-    pivot_df = df.pivot_table(
-        values=value_column,
-        index=y_column,
-        columns=x_column,
-        aggfunc='sum'
-    )
+    pivot_df = _pivot(df, x_column, y_column, value_column)
     
     fig = go.Figure(data=go.Heatmap(
-        z=pivot_df.values,
-        x=pivot_df.columns,
-        y=pivot_df.index,
+        z=pivot_df.to_numpy(dtype=np.float32),
+        x=pivot_df.columns.to_numpy(),
+        y=pivot_df.index.to_numpy(),
         colorscale='Reds',
         hoverongaps=False,
         hovertemplate='Année: %{x}<br>Type: %{y}<br>Nombre: %{z:,.0f}<extra></extra>'
@@ -276,6 +454,20 @@ def create_heatmap(df: pd.DataFrame,
     return fig
 
 
+# Marqueur circulaire rouge (rendu côté navigateur par FastMarkerCluster)
+_CIRCLE_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 5, color: 'red', fill: true, fillColor: 'red'
+    });
+    if (row[2]) {
+        marker.bindPopup(row[2], {maxWidth: 200});
+    }
+    return marker;
+}
+"""
+
+
 def create_folium_map(df: pd.DataFrame,
                       lat_column: str = 'latitude',
                       lon_column: str = 'longitude',
@@ -304,22 +496,20 @@ def create_folium_map(df: pd.DataFrame,
     
     # Ajouter des marqueurs si les données géographiques sont disponibles
     if lat_column in df.columns and lon_column in df.columns:
-        for idx, row in df.iterrows():
-            if pd.notna(row[lat_column]) and pd.notna(row[lon_column]):
-                popup_text = ""
-                if popup_columns:
-                    for col in popup_columns:
-                        if col in row:
-                            popup_text += f"<b>{col}:</b> {row[col]}<br>"
-                
-                folium.CircleMarker(
-                    location=[row[lat_column], row[lon_column]],
-                    radius=5,
-                    popup=folium.Popup(popup_text, max_width=200),
-                    color='red',
-                    fill=True,
-                    fillColor='red'
-                ).add_to(m)
+        mask = df[[lat_column, lon_column]].notna().all(axis=1).to_numpy()
+        points = df.loc[mask, [lat_column, lon_column]].to_numpy(dtype=np.float64)
+        
+        # Popups construits en une passe vectorisée par colonne
+        popups = pd.Series('', index=df.index[mask])
+        for col in popup_columns or []:
+            if col in df.columns:
+                popups += f"<b>{col}:</b> " + df.loc[mask, col].astype(str) + "<br>"
+        
+        # Un seul tableau JS regroupé (clusters) au lieu d'une couche Leaflet par ligne
+        FastMarkerCluster(
+            data=[[lat, lon, popup] for (lat, lon), popup in zip(points.tolist(), popups.tolist())],
+            callback=_CIRCLE_MARKER_CALLBACK
+        ).add_to(m)
     
     return m
 
@@ -331,6 +521,9 @@ def create_statistics_cards(total_crimes: int,
     """
     Crée des cartes de statistiques en HTML.
     
+    Le HTML ne contient que les valeurs et des noms de classes ; les styles
+    (STAT_CARDS_CSS) sont injectés avec le CSS de la page.
+    
     Args:
         total_crimes: Nombre total de crimes
         evolution_pct: Évolution en pourcentage
@@ -340,39 +533,17 @@ def create_statistics_cards(total_crimes: int,
     Returns:
         HTML string
     """
-    evolution_color = "green" if evolution_pct < 0 else "red"
     evolution_icon = "↓" if evolution_pct < 0 else "↑"
     
-    html = f"""
-    <div style="display: flex; gap: 20px; margin: 20px 0;">
-        <div style="flex: 1; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 20px; border-radius: 10px; color: white;">
-            <h3 style="margin: 0; font-size: 16px; opacity: 0.9;">Total des faits</h3>
-            <p style="margin: 10px 0 0 0; font-size: 32px; font-weight: bold;">
-                {total_crimes:,.0f}
-            </p>
-        </div>
-        <div style="flex: 1; background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); 
-                    padding: 20px; border-radius: 10px; color: white;">
-            <h3 style="margin: 0; font-size: 16px; opacity: 0.9;">Évolution annuelle</h3>
-            <p style="margin: 10px 0 0 0; font-size: 32px; font-weight: bold;">
-                {evolution_icon} {abs(evolution_pct):.1f}%
-            </p>
-        </div>
-        <div style="flex: 1; background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); 
-                    padding: 20px; border-radius: 10px; color: white;">
-            <h3 style="margin: 0; font-size: 16px; opacity: 0.9;">Crime principal</h3>
-            <p style="margin: 10px 0 0 0; font-size: 18px; font-weight: bold;">
-                {top_crime_type[:30]}
-            </p>
-            <p style="margin: 5px 0 0 0; font-size: 24px; font-weight: bold;">
-                {top_crime_pct:.1f}%
-            </p>
-        </div>
-    </div>
-    """
-    return html
-
-
-# Import numpy pour les calculs
-import numpy as np
+    # Seules les valeurs changent d'un rerun à l'autre : le style est dans STAT_CARDS_CSS
+    return (
+        '<div class="stat-cards">'
+        '<div class="stat-card grad-a"><h3>Total des faits</h3>'
+        f'<p>{total_crimes:,.0f}</p></div>'
+        '<div class="stat-card grad-b"><h3>Évolution annuelle</h3>'
+        f'<p>{evolution_icon} {abs(evolution_pct):.1f}%</p></div>'
+        '<div class="stat-card grad-c"><h3>Crime principal</h3>'
+        f'<p class="stat-label">{top_crime_type[:30]}</p>'
+        f'<p class="stat-pct">{top_crime_pct:.1f}%</p></div>'
+        '</div>'
+    )
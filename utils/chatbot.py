@@ -1,14 +1,24 @@
 """Module pour l'intégration de l'IA via LiteLLM."""
 
 import os
-from typing import List, Dict, Optional
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 import streamlit as st
 from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
 
+from .data import month_columns
+
 # Charger les variables d'environnement
 load_dotenv()
 
+# Taille maximale de l'historique de conversation (messages, puis tokens estimés)
+CHAT_HISTORY_MAX = int(os.getenv("CHAT_HISTORY_MAX", "40"))
+CHAT_HISTORY_MAX_TOKENS = 4000
+
 # Import LiteLLM
 try:
     from litellm import completion
@@ -18,6 +28,61 @@ except ImportError:
     st.warning("⚠️ LiteLLM n'est pas disponible. Fonctionnalités IA limitées.")
 
 
+# Réponses de secours par mot-clé, appariées en un seul passage d'expression régulière
+_FALLBACK_RESPONSES = {
+    "tendance": "Les données montrent des variations selon les périodes et les territoires. Pour une analyse détaillée, consultez les graphiques ci-dessus.",
+    "comparaison": "La comparaison entre départements révèle des disparités importantes liées à la densité de population et aux contextes locaux.",
+    "augmentation": "Plusieurs facteurs peuvent expliquer les variations: démographie, politiques de sécurité, contexte socio-économique.",
+    "diminution": "Une baisse peut résulter d'actions préventives, de changements démographiques ou de modifications dans les méthodes d'enregistrement."
+}
+_FALLBACK_RE = re.compile("|".join(f"(?P<{key}>{re.escape(key)})" for key in _FALLBACK_RESPONSES))
+_DEFAULT_FALLBACK_RESPONSE = "Je peux vous aider à analyser les données de criminalité. Posez-moi des questions sur les tendances, les comparaisons entre départements, ou les types de crimes."
+
+
+@lru_cache(maxsize=1)
+def _detect_models_once(openai_key: str, anthropic_key: str) -> Tuple[str, ...]:
+    """
+    Détermine les modèles utilisables à partir des clés API.
+    
+    Les clés font partie de la clé de cache : le calcul n'est refait
+    que si l'environnement change.
+    
+    Args:
+        openai_key: Clé API OpenAI (chaîne vide si absente)
+        anthropic_key: Clé API Anthropic (chaîne vide si absente)
+        
+    Returns:
+        Tuple des noms de modèles
+    """
+    models = ()
+    if openai_key and openai_key != "your_api_key_here":
+        models += ("gpt-5-nano", "gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo")
+    if anthropic_key and anthropic_key != "your_anthropic_key_here":
+        models += (
+            "claude-3-opus-20240229",
+            "claude-3-sonnet-20240229",
+            "claude-3-haiku-20240307"
+        )
+    return models
+
+@st.cache_data(ttl=86400, max_entries=256, show_spinner="L'IA réfléchit...")
+def _cached_completion(model: str, messages: List[Dict]) -> str:
+    """
+    Appelle le modèle et met la réponse en cache.
+    
+    La clé est le contenu des messages (prompt système, contexte, question)
+    et le modèle : une requête identique ne rappelle pas l'API.
+    Les exceptions ne sont pas mises en cache.
+    """
+    response = completion(
+        model=model,
+        messages=messages,
+        temperature=0.7,
+        max_tokens=500
+    )
+    return response.choices[0].message.content
+
+
 class CrimeAnalysisBot:
     """Chatbot pour l'analyse de données de criminalité."""
     
@@ -33,29 +98,14 @@ class CrimeAnalysisBot:
         """
         self.default_model = os.getenv("DEFAULT_MODEL", default_model)
         self.fallback_model = os.getenv("FALLBACK_MODEL", fallback_model)
-        self.conversation_history = []
+        self.conversation_history: deque = deque(maxlen=CHAT_HISTORY_MAX)
+        self._history_tokens = 0
         
     def get_available_models(self) -> List[str]:
         """Retourne la liste des modèles disponibles."""
-        models = []
-        
-        # Vérifier les clés API disponibles
-        openai_key = os.getenv("OPENAI_API_KEY")
-        if openai_key and openai_key != "your_api_key_here":
-            models.extend(["gpt-5-nano", "gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo"])
-        
-        anthropic_key = os.getenv("ANTHROPIC_API_KEY")
-        if anthropic_key and anthropic_key != "your_anthropic_key_here":
-            models.extend([
-                "claude-3-opus-20240229",
-                "claude-3-sonnet-20240229", 
-                "claude-3-haiku-20240307"
-            ])
-        
-        if not models:
-            models = [self.default_model]
-        
-        return models
+        models = _detect_models_once(os.getenv("OPENAI_API_KEY", ""),
+                                     os.getenv("ANTHROPIC_API_KEY", ""))
+        return list(models) or [self.default_model]
     
     def generate_response(self, 
                          prompt: str, 
@@ -76,8 +126,48 @@ class CrimeAnalysisBot:
             return self._generate_fallback_response(prompt)
         
         model_to_use = model or self.default_model
+        messages = self._build_messages(prompt, context)
+        
+        # Modèle demandé puis modèle de secours, une tentative chacun
+        candidates = [model_to_use]
+        if model_to_use != self.fallback_model:
+            candidates.append(self.fallback_model)
         
-        # Construire le message système
+        answer = self._first_completion(messages, candidates)
+        if answer is None:
+            return self._generate_fallback_response(prompt)
+        
+        # Sauvegarder dans l'historique
+        self._remember("user", prompt)
+        self._remember("assistant", answer)
+        
+        return answer
+    
+    def _first_completion(self,
+                          messages: List[Dict],
+                          candidates: List[str],
+                          error: Optional[Exception] = None) -> Optional[str]:
+        """
+        Essaie chaque modèle une fois, dans l'ordre.
+        
+        Args:
+            messages: Messages envoyés au modèle
+            candidates: Modèles à essayer
+            error: Erreur déjà rencontrée (affichée si aucun modèle ne répond)
+            
+        Returns:
+            Première réponse obtenue, ou None (après affichage de l'erreur)
+        """
+        for candidate in candidates:
+            try:
+                return _cached_completion(candidate, messages)
+            except Exception as e:
+                error = e
+        st.error(f"Erreur lors de la génération: {error}")
+        return None
+    
+    def _build_messages(self, prompt: str, context: Optional[str] = None) -> List[Dict]:
+        """Construit les messages (système + utilisateur) envoyés au modèle."""
         system_message = """Tu es un assistant expert en analyse de données de criminalité en France.
         Tu aides les utilisateurs à comprendre les statistiques, identifier les tendances et 
         tirer des conclusions pertinentes. Réponds de manière concise et factuelle."""
@@ -85,69 +175,101 @@ class CrimeAnalysisBot:
         if context:
             system_message += f"\n\nContexte des données:\n{context}"
         
-        messages = [
+        return [
             {"role": "system", "content": system_message},
             {"role": "user", "content": prompt}
         ]
+    
+    def generate_response_stream(self,
+                                 prompt: str,
+                                 model: Optional[str] = None,
+                                 context: Optional[str] = None) -> Iterator[str]:
+        """
+        Génère une réponse avec l'IA, morceau par morceau.
+        
+        Args:
+            prompt: Question de l'utilisateur
+            model: Modèle à utiliser (None = défaut)
+            context: Contexte additionnel
+            
+        Yields:
+            Fragments de texte de la réponse, au fil de leur réception
+        """
+        if not LITELLM_AVAILABLE:
+            yield self._generate_fallback_response(prompt)
+            return
         
+        model_to_use = model or self.default_model
+        messages = self._build_messages(prompt, context)
+        
+        parts = []
         try:
             response = completion(
                 model=model_to_use,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=500,
+                stream=True
             )
-            
-            answer = response.choices[0].message.content
-            
-            # Sauvegarder dans l'historique
-            self.conversation_history.append({
-                "role": "user",
-                "content": prompt
-            })
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": answer
-            })
-            
-            return answer
-            
+            # Une erreur peut aussi survenir en cours de flux (quota, coupure...)
+            for chunk in response:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
         except Exception as e:
-            st.error(f"Erreur lors de la génération: {e}")
-            # Essayer avec le modèle de secours
-            if model_to_use != self.fallback_model:
-                try:
-                    return self.generate_response(prompt, self.fallback_model, context)
-                except:
-                    return self._generate_fallback_response(prompt)
-            return self._generate_fallback_response(prompt)
+            # Modèle de secours sans streaming, puis réponse de secours
+            retry = [self.fallback_model] if model_to_use != self.fallback_model else []
+            answer = self._first_completion(messages, retry, error=e)
+            if answer is None:
+                answer = self._generate_fallback_response(prompt)
+            if parts:
+                parts.append("\n\n")
+                yield "\n\n"
+            parts.append(answer)
+            yield answer
+        
+        # Sauvegarder dans l'historique une fois la réponse complète
+        self._remember("user", prompt)
+        self._remember("assistant", "".join(parts))
+    
+    def _remember(self, role: str, content: str):
+        """
+        Ajoute un message à l'historique en respectant ses deux limites.
+        
+        Les plus anciens messages sont retirés quand l'historique atteint
+        CHAT_HISTORY_MAX messages ou dépasse CHAT_HISTORY_MAX_TOKENS tokens
+        (estimés à 4 caractères par token). Le dernier message est toujours gardé.
+        """
+        history = self.conversation_history
+        if len(history) == history.maxlen:
+            self._history_tokens -= len(history.popleft()["content"]) // 4
+        
+        history.append({"role": role, "content": content})
+        self._history_tokens += len(content) // 4
+        
+        while self._history_tokens > CHAT_HISTORY_MAX_TOKENS and len(history) > 1:
+            self._history_tokens -= len(history.popleft()["content"]) // 4
     
     def _generate_fallback_response(self, prompt: str) -> str:
         """Génère une réponse de secours sans IA."""
-        responses = {
-            "tendance": "Les données montrent des variations selon les périodes et les territoires. Pour une analyse détaillée, consultez les graphiques ci-dessus.",
-            "comparaison": "La comparaison entre départements révèle des disparités importantes liées à la densité de population et aux contextes locaux.",
-            "augmentation": "Plusieurs facteurs peuvent expliquer les variations: démographie, politiques de sécurité, contexte socio-économique.",
-            "diminution": "Une baisse peut résulter d'actions préventives, de changements démographiques ou de modifications dans les méthodes d'enregistrement."
-        }
-        
-        prompt_lower = prompt.lower()
-        for key, response in responses.items():
-            if key in prompt_lower:
-                return response
-        
-        return "Je peux vous aider à analyser les données de criminalité. Posez-moi des questions sur les tendances, les comparaisons entre départements, ou les types de crimes."
+        match = _FALLBACK_RE.search(prompt.lower())
+        return _FALLBACK_RESPONSES[match.lastgroup] if match else _DEFAULT_FALLBACK_RESPONSE
     
-    def analyze_trends(self, df: pd.DataFrame, department: Optional[str] = None) -> str:
+    def analyze_trends(self,
+                       df: pd.DataFrame,
+                       department: Optional[str] = None,
+                       stream: bool = False) -> Union[str, Iterator[str]]:
         """
         Analyse les tendances dans les données.
         
         Args:
             df: DataFrame avec les données
             department: Département à analyser
+            stream: Retourner un itérateur de fragments (pour st.write_stream)
             
         Returns:
-            Analyse textuelle
+            Analyse textuelle (ou itérateur de fragments si stream=True)
         """
         # Préparer le contexte
         if department:
@@ -159,10 +281,16 @@ class CrimeAnalysisBot:
         
         # Calculer quelques statistiques
         if 'annee' in df_filtered.columns and 'faits' in df_filtered.columns:
-            evolution = df_filtered.groupby('annee')['faits'].sum()
-            if len(evolution) > 1:
-                variation = ((evolution.iloc[-1] - evolution.iloc[0]) / evolution.iloc[0] * 100)
-                context += f"\nÉvolution totale: {variation:.1f}%"
+            # Seules la première et la dernière année servent : deux sommes masquées
+            annees = df_filtered['annee']
+            premiere, derniere = annees.min(), annees.max()
+            if premiere < derniere:
+                faits = df_filtered['faits']
+                debut = faits[annees == premiere].sum()
+                fin = faits[annees == derniere].sum()
+                if debut:
+                    variation = (fin - debut) / debut * 100
+                    context += f"\nÉvolution totale: {variation:.1f}%"
         
         prompt = f"""Analyse les tendances de criminalité basées sur ces informations:
         {context}
@@ -172,12 +300,15 @@ class CrimeAnalysisBot:
         2. Les points notables
         3. Une conclusion ou recommandation"""
         
+        if stream:
+            return self.generate_response_stream(prompt, context=context)
         return self.generate_response(prompt, context=context)
     
     def generate_report(self, 
                        department: str,
                        stats: Dict,
-                       model: Optional[str] = None) -> str:
+                       model: Optional[str] = None,
+                       stream: bool = False) -> Union[str, Iterator[str]]:
         """
         Génère un rapport automatique.
         
@@ -185,9 +316,10 @@ class CrimeAnalysisBot:
             department: Nom du département
             stats: Dictionnaire de statistiques
             model: Modèle à utiliser
+            stream: Retourner un itérateur de fragments (pour st.write_stream)
             
         Returns:
-            Rapport textuel
+            Rapport textuel (ou itérateur de fragments si stream=True)
         """
         context = f"""Statistiques pour {department}:
         - Total des faits: {stats.get('total', 0):,.0f}
@@ -206,6 +338,8 @@ class CrimeAnalysisBot:
         
         Utilise un ton professionnel et factuel."""
         
+        if stream:
+            return self.generate_response_stream(prompt, model, context)
         return self.generate_response(prompt, model, context)
     
     def compare_departments(self,
@@ -265,9 +399,27 @@ class CrimeAnalysisBot:
         """
         return self.generate_response(question, model, data_context)
     
+    def answer_question_stream(self,
+                               question: str,
+                               data_context: str,
+                               model: Optional[str] = None) -> Iterator[str]:
+        """
+        Répond à une question sur les données, en streaming (pour st.write_stream).
+        
+        Args:
+            question: Question de l'utilisateur
+            data_context: Contexte des données
+            model: Modèle à utiliser
+            
+        Yields:
+            Fragments de texte de la réponse
+        """
+        return self.generate_response_stream(question, model, data_context)
+    
     def clear_history(self):
         """Efface l'historique de conversation."""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self._history_tokens = 0
 
 
 def get_data_summary(df: pd.DataFrame) -> str:
@@ -283,8 +435,7 @@ def get_data_summary(df: pd.DataFrame) -> str:
     summary = []
     
     if 'annee' in df.columns:
-        years = df['annee'].unique()
-        summary.append(f"Période: {years.min():.0f} - {years.max():.0f}")
+        summary.append(f"Période: {df['annee'].min():.0f} - {df['annee'].max():.0f}")
     
     if 'code_dept' in df.columns:
         n_depts = df['code_dept'].nunique()
@@ -293,10 +444,12 @@ def get_data_summary(df: pd.DataFrame) -> str:
     if 'faits' in df.columns:
         total = df['faits'].sum()
         summary.append(f"Total des faits: {total:,.0f}")
-    elif any(col.isdigit() for col in df.columns):
-        month_cols = [col for col in df.columns if col.isdigit()]
-        total = df[month_cols].sum().sum()
-        summary.append(f"Total des faits: {total:,.0f}")
+    else:
+        month_cols = month_columns(df.columns)
+        if month_cols:
+            # Une seule réduction sur le bloc NumPy (pas de Series intermédiaire)
+            total = np.nansum(df[month_cols].to_numpy(dtype=np.float64))
+            summary.append(f"Total des faits: {total:,.0f}")
     
     if 'classe' in df.columns:
         n_types = df['classe'].nunique()
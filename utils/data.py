@@ -1,12 +1,188 @@
 """Module utilitaire pour la gestion et le traitement des données."""
 
+import os
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 import requests
 from pathlib import Path
 import json
-from typing import Optional, Dict, List
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Iterable, Iterator, List, Mapping, Tuple, Union
 import streamlit as st
 
+# Import Numba (optionnel) pour accélérer le calcul des faits
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Colonnes utilisées par l'application (en plus des colonnes de mois)
+CRIME_COLUMNS = ['code_dept', 'departement', 'annee', 'classe', 'faits']
+
+# Partitionnement Hive du dataset Parquet (un répertoire par année)
+PARQUET_PARTITIONING = ds.partitioning(pa.schema([('annee', pa.int16())]), flavor='hive')
+
+# Données de population approximatives par département (2023)
+_POPULATION = MappingProxyType({
+    '75': 2165000, '13': 2040000, '69': 1850000, '59': 2608000,
+    '92': 1609000, '93': 1623000, '94': 1395000, '91': 1296000,
+    '78': 1431000, '31': 1380000, '06': 1083000, '44': 1429000,
+    '33': 1623000, '67': 1142000, '62': 1471000, '76': 1254000,
+    '77': 1421000, '95': 1241000, '35': 1079000, '34': 1175000
+})
+
+# Nombre maximal de lignes par row group (~128 Mo pour ce schéma)
+PARQUET_ROW_GROUP_SIZE = 1_000_000
+
+# Taille des blocs écrits sur disque pendant le téléchargement (1 Mo)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Nombre de lignes du CSV analysées et nettoyées à la fois
+CSV_CHUNK_SIZE = 200_000
+
+# Colonnes du CSV source conservées à la lecture (en plus des colonnes de mois)
+# et types imposés : les libellés sont lus directement en catégories
+_CSV_COLUMNS = {'Code département', 'Département', 'Classe', 'classe', 'Millésime', 'annee', 'faits'}
+_CSV_DTYPE = {
+    'Code département': 'category',
+    'Département': 'category',
+    'Classe': 'category',
+    'classe': 'category'
+}
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _row_sum_i32(values):
+        """Somme par ligne (en int64) d'un bloc int32 contigu, parallélisée sur les lignes."""
+        n_rows, n_cols = values.shape
+        out = np.empty(n_rows, dtype=np.int64)
+        for i in prange(n_rows):
+            total = 0
+            for j in range(n_cols):
+                total += values[i, j]
+            out[i] = total
+        return out
+
+
+def _hash_dataframe(df: pd.DataFrame) -> Tuple:
+    """
+    Empreinte d'un DataFrame pour les clés de cache Streamlit.
+    
+    Toutes les lignes sont hachées (vectorisé, sans sérialisation) : un
+    échantillon début/fin laisserait deux filtrages différents partager la
+    même clé et renverrait un résultat faux.
+    """
+    return df.shape, tuple(df.columns), int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+# hash_funcs pour les fonctions mises en cache qui reçoivent des DataFrames
+_DF_HASH = {pd.DataFrame: _hash_dataframe}
+
+
+@lru_cache(maxsize=None)
+def _is_month_column(col) -> bool:
+    """Indique si une colonne contient des comptes mensuels ('01'..'12', 'mois_...')."""
+    return isinstance(col, str) and (col.isdigit() or 'mois' in col.lower())
+
+
+def month_columns(columns) -> List[str]:
+    """
+    Retourne les colonnes de mois parmi des noms de colonnes.
+    
+    Le test est mémorisé par nom : les mêmes colonnes reviennent à chaque
+    chargement et à chaque rerun.
+    
+    Args:
+        columns: Noms de colonnes (df.columns, schéma Arrow...)
+        
+    Returns:
+        Liste des colonnes de mois, dans l'ordre d'origine
+    """
+    return [col for col in columns if _is_month_column(col)]
+
+
+def unique_sorted(values: pd.Series) -> list:
+    """
+    Retourne les valeurs distinctes (non manquantes) d'une série, triées.
+    
+    Pour une série catégorielle, seuls les codes entiers sont parcourus :
+    les libellés ne sont ni hachés ni comparés ligne à ligne.
+    
+    Args:
+        values: Série à résumer
+        
+    Returns:
+        Liste triée des valeurs présentes
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        present = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)) > 0
+        return sorted(values.cat.categories[present].tolist())
+    
+    return sorted(values.dropna().unique().tolist())
+
+
+def _download(url: str, destination: Path) -> Path:
+    """
+    Télécharge un fichier par blocs, directement sur disque.
+    
+    Le contenu n'est jamais chargé en entier en mémoire. Le fichier est écrit
+    sous un nom temporaire puis renommé : un téléchargement interrompu ne
+    laisse pas de cache tronqué.
+    
+    Args:
+        url: Adresse du fichier
+        destination: Chemin du fichier à écrire
+        
+    Returns:
+        Chemin du fichier téléchargé
+    """
+    partial = destination.with_name(destination.name + ".part")
+    with requests.get(url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        with open(partial, "wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+    partial.replace(destination)
+    return destination
+
+
+def _read_cached_csv(cache_file: Path, chunksize: Optional[int] = None):
+    """
+    Lit le CSV mis en cache avec le moteur C.
+    
+    Le fichier téléchargé est séparé par des « ; » ; les caches écrits par
+    les versions précédentes (to_csv) le sont par des virgules. Seules les
+    colonnes utiles sont analysées, avec des types imposés. Il n'y a pas de
+    relecture de secours : une erreur d'analyse (y compris en cours
+    d'itération sur les blocs) remonte telle quelle et interrompt la
+    conversion. Une colonne absente du schéma est simplement ignorée.
+    
+    Args:
+        cache_file: Chemin du CSV
+        chunksize: Nombre de lignes par bloc (None = tout le fichier)
+        
+    Returns:
+        DataFrame, ou itérateur de DataFrames si chunksize est donné
+    """
+    with open(cache_file, encoding="utf-8") as f:
+        sep = ";" if ";" in f.readline() else ","
+    return pd.read_csv(cache_file, sep=sep, encoding="utf-8", engine="c",
+                       usecols=_is_csv_column, dtype=_CSV_DTYPE, chunksize=chunksize)
+
+
+def _is_csv_column(col: str) -> bool:
+    """Indique si une colonne du CSV source est utilisée par l'application."""
+    return col in _CSV_COLUMNS or _is_month_column(col)
+
 
 class DataLoader:
     """Classe pour charger et traiter les données de criminalité."""
@@ -14,42 +190,269 @@ class DataLoader:
     def __init__(self, data_dir: str = "data/processed"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        
-    @st.cache_data
-    def load_crime_data(_self, sample_size: Optional[int] = None) -> pd.DataFrame:
+        self.parquet_dir = self.data_dir / "crime_data.parquet"
+        # Table de démonstration, tirée une seule fois si le téléchargement échoue
+        self._demo_table: Optional[pa.Table] = None
+        
+    def load_crime_data(self,
+                        sample_size: Optional[int] = None,
+                        years: Optional[Tuple[int, int]] = None,
+                        departement: Optional[str] = None,
+                        classe: Optional[str] = None,
+                        columns: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Charge les données de criminalité depuis l'API data.gouv.fr
+        Charge les données de criminalité depuis le dataset Parquet.
+        
+        Les filtres et la sélection de colonnes sont appliqués au niveau du
+        stockage : les partitions et row groups hors filtre ne sont pas lus.
         
         Args:
-            sample_size: Nombre de lignes à charger (None = toutes)
+            sample_size: Nombre maximal de lignes après filtrage (None = toutes)
+            years: Période (année de début, année de fin) incluse
+            departement: Nom du département à conserver
+            classe: Type de crime à conserver
+            columns: Colonnes à charger (None = colonnes utiles à l'application ;
+                les colonnes de mois seulement si 'faits' n'est pas stocké)
             
         Returns:
             DataFrame avec les données de criminalité
         """
-        # URL de l'API data.gouv.fr pour les crimes et délits
-        url = "https://www.data.gouv.fr/fr/datasets/r/fa9dd0ab-a8ab-45ba-a7cf-a59a8264811b"
+        dataset = self._get_dataset()
+        
+        if columns is None:
+            # Les colonnes de mois ne servent qu'à calculer 'faits' : inutile de
+            # les lire quand le dataset stocke déjà ce total
+            need_months = 'faits' not in dataset.schema.names
+            load_columns = [
+                col for col in dataset.schema.names
+                if col in CRIME_COLUMNS or (need_months and _is_month_column(col))
+            ]
+        else:
+            load_columns = [col for col in columns if col in dataset.schema.names]
         
-        cache_file = _self.data_dir / "crime_data.csv"
+        expr = self._build_filter(dataset.schema.names, years, departement, classe)
         
-        # Charger depuis le cache si disponible
-        if cache_file.exists():
-            df = pd.read_csv(cache_file, nrows=sample_size)
+        if sample_size is None:
+            table = dataset.to_table(columns=load_columns, filter=expr)
         else:
-            try:
-                # Télécharger les données
-                df = pd.read_csv(url, nrows=sample_size, sep=";", encoding="utf-8")
-                # Sauvegarder en cache
-                df.to_csv(cache_file, index=False)
-            except Exception as e:
-                st.warning(f"Impossible de télécharger les données: {e}. Utilisation de données de démonstration.")
-                df = _self._create_demo_data()
-        
-        # Nettoyage et préparation
-        df = _self._clean_crime_data(df)
+            table = dataset.head(sample_size, columns=load_columns, filter=expr)
+        
+        df = self._downcast_dtypes(table.to_pandas())
+        
+        # Garantir la colonne 'faits' pour les traitements en aval
+        if columns is None or 'faits' in columns:
+            df = self._add_faits_column(df)
+        
         return df
     
+    def to_parquet(self,
+                   data: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+                   overwrite: bool = True) -> Path:
+        """
+        Convertit les données nettoyées en dataset Parquet partitionné par année.
+        
+        Les blocs sont écrits au fil de l'eau : un seul bloc est converti en
+        Arrow à la fois. Seules les colonnes de CRIME_COLUMNS sont stockées,
+        avec le schéma du premier bloc ('faits' en int64 pour que tous les
+        blocs concordent).
+        
+        Le dataset est écrit dans un répertoire temporaire voisin, renommé en
+        crime_data.parquet/ une fois complet : une conversion interrompue ne
+        laisse jamais de dataset partiel à la place du vrai.
+        
+        Args:
+            data: DataFrame nettoyé, ou itérable de blocs nettoyés (voir _clean_crime_data)
+            overwrite: Remplacer un dataset existant ; si False, un dataset
+                terminé entre-temps (par une autre session) est conservé
+            
+        Returns:
+            Chemin du dataset Parquet
+        """
+        frames = iter([data] if isinstance(data, pd.DataFrame) else data)
+        first = next(frames, None)
+        if first is None:
+            raise ValueError("Aucune donnée à convertir en Parquet")
+        
+        first_table = self._to_storage_table(first)
+        schema = first_table.schema
+        if 'faits' in schema.names:
+            schema = schema.set(schema.get_field_index('faits'), pa.field('faits', pa.int64()))
+        
+        def batches() -> Iterator[pa.RecordBatch]:
+            yield from first_table.cast(schema).to_batches()
+            for frame in frames:
+                yield from self._to_storage_table(frame).cast(schema).to_batches()
+        
+        # Nom unique : deux sessions qui convertissent en même temps ne se gênent pas
+        staging = Path(tempfile.mkdtemp(prefix=self.parquet_dir.name + ".", suffix=".part",
+                                        dir=self.data_dir))
+        try:
+            ds.write_dataset(
+                batches(),
+                staging,
+                schema=schema,
+                format="parquet",
+                partitioning=PARQUET_PARTITIONING if 'annee' in schema.names else None,
+                file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+                max_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+                existing_data_behavior="overwrite_or_ignore"
+            )
+            if self.parquet_dir.exists():
+                if not overwrite:
+                    shutil.rmtree(staging)
+                    return self.parquet_dir
+                shutil.rmtree(self.parquet_dir)
+            os.replace(staging, self.parquet_dir)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return self.parquet_dir
+    
+    def _to_storage_table(self, df: pd.DataFrame) -> pa.Table:
+        """Table Arrow d'un bloc nettoyé, limitée aux colonnes stockées (sans métadonnées pandas)."""
+        columns = [col for col in CRIME_COLUMNS if col in df.columns]
+        return self._to_arrow(df[columns]).replace_schema_metadata(None)
+    
+    def _get_dataset(self) -> ds.Dataset:
+        """Ouvre le dataset Parquet, en le construisant au premier appel."""
+        if self._demo_table is not None:
+            return ds.dataset(self._demo_table)
+        
+        if not self.parquet_dir.exists():
+            # URL de l'API data.gouv.fr pour les crimes et délits
+            url = "https://www.data.gouv.fr/fr/datasets/r/fa9dd0ab-a8ab-45ba-a7cf-a59a8264811b"
+            
+            cache_file = self.data_dir / "crime_data.csv"
+            
+            # Télécharger le fichier brut dans le cache s'il n'existe pas encore
+            if not cache_file.exists():
+                try:
+                    _download(url, cache_file)
+                except Exception as e:
+                    st.warning(f"Impossible de télécharger les données: {e}. Utilisation de données de démonstration.")
+                    # Les données de démonstration ne sont pas persistées sur disque,
+                    # mais conservées sur l'instance pour que tous les chargements concordent
+                    self._demo_table = self._to_arrow(self._create_demo_data())
+                    return ds.dataset(self._demo_table)
+            
+            # Conversion unique, bloc par bloc : chaque bloc est nettoyé puis
+            # écrit avant la lecture du suivant (un seul bloc en mémoire)
+            self.to_parquet(
+                (self._clean_crime_data(chunk)
+                 for chunk in _read_cached_csv(cache_file, chunksize=CSV_CHUNK_SIZE)),
+                overwrite=False
+            )
+        
+        return ds.dataset(self.parquet_dir, format="parquet", partitioning=PARQUET_PARTITIONING)
+    
+    def _downcast_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Réduit l'empreinte mémoire des colonnes chargées.
+        
+        Les libellés deviennent des catégories (groupby sur des codes entiers),
+        l'année passe en uint16 et les comptes de faits en int32.
+        """
+        for col in ('departement', 'code_dept', 'classe'):
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
+        if 'annee' in df.columns:
+            df['annee'] = pd.to_numeric(df['annee'], downcast='unsigned')
+        
+        count_cols = [col for col in df.columns if col == 'faits' or _is_month_column(col)]
+        for col in count_cols:
+            if pd.api.types.is_integer_dtype(df[col]):
+                df[col] = df[col].astype('int32')
+        
+        return df
+    
+    def _add_faits_column(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcule une seule fois le nombre de faits (somme des colonnes de mois).
+        
+        La somme est accumulée en int64 puis stockée en int32 seulement si
+        tous les totaux tiennent dans cette plage ; sinon elle reste en int64.
+        """
+        if 'faits' in df.columns:
+            return df
+        
+        month_cols = month_columns(df.columns)
+        if month_cols:
+            month_block = df[month_cols]
+            if not all(pd.api.types.is_integer_dtype(dtype) for dtype in month_block.dtypes):
+                # to_numpy(na_value=...) convertit avant de remplacer : les NaN
+                # deviendraient INT32_MIN, ils sont donc remplacés en amont
+                month_block = month_block.fillna(0)
+            month_values = np.ascontiguousarray(month_block.to_numpy(dtype=np.int32))
+            if NUMBA_AVAILABLE:
+                totals = _row_sum_i32(month_values)
+            else:
+                totals = month_values.sum(axis=1, dtype=np.int64)
+            if len(totals) == 0 or totals.max() <= np.iinfo(np.int32).max:
+                totals = totals.astype(np.int32)
+            df['faits'] = totals
+        else:
+            df['faits'] = np.int32(1)
+        
+        return df
+    
+    def _to_arrow(self, df: pd.DataFrame) -> pa.Table:
+        """Convertit un DataFrame nettoyé en table Arrow au schéma homogène."""
+        # Les codes département mélangent entiers et chaînes ('2A', '971') ;
+        # le dtype 'string[pyarrow]' conserve les valeurs manquantes (pas de 'nan'
+        # littéral) et stocke déjà les chaînes dans des buffers Arrow
+        dtypes = {col: 'string[pyarrow]' for col in ('code_dept', 'departement', 'classe') if col in df.columns}
+        if 'annee' in df.columns:
+            dtypes['annee'] = 'int16'
+        # Une seule conversion, sans copie préalable du DataFrame
+        return pa.Table.from_pandas(df.astype(dtypes), preserve_index=False)
+    
+    @staticmethod
+    def _build_filter(available_columns: List[str],
+                      years: Optional[Tuple[int, int]] = None,
+                      departement: Optional[str] = None,
+                      classe: Optional[str] = None) -> Optional[ds.Expression]:
+        """Construit l'expression de filtre Arrow à partir des filtres actifs."""
+        conditions = []
+        
+        if years is not None and 'annee' in available_columns:
+            conditions.append((ds.field('annee') >= years[0]) & (ds.field('annee') <= years[1]))
+        
+        if departement is not None and 'departement' in available_columns:
+            conditions.append(ds.field('departement') == departement)
+        
+        if classe is not None and 'classe' in available_columns:
+            conditions.append(ds.field('classe') == classe)
+        
+        if not conditions:
+            return None
+        
+        expr = conditions[0]
+        for condition in conditions[1:]:
+            expr = expr & condition
+        return expr
+    
+    def get_filter_options(self) -> Dict[str, list]:
+        """
+        Retourne les valeurs possibles des filtres de la sidebar.
+        
+        Seules les colonnes des filtres sont lues depuis le dataset.
+        
+        Returns:
+            Dictionnaire {colonne: valeurs triées}
+        """
+        df = self.load_crime_data(columns=['annee', 'departement', 'classe'])
+        return {
+            col: unique_sorted(df[col]) if col in df.columns else []
+            for col in ['annee', 'departement', 'classe']
+        }
+    
     def _clean_crime_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Nettoie et prépare les données de criminalité."""
+        """
+        Nettoie et prépare les données de criminalité.
+        
+        Le DataFrame reçu (un bloc fraîchement lu du CSV) est modifié en place.
+        """
         # Renommer les colonnes pour standardisation
         column_mapping = {
             'Code département': 'code_dept',
@@ -64,8 +467,8 @@ class DataLoader:
             'annee': 'annee'
         }
         
-        # Renommer les colonnes qui existent
-        df = df.rename(columns={k: v for k, v in column_mapping.items() if k in df.columns})
+        # Renommer les colonnes en place (métadonnées seules, sans copie des données)
+        df.columns = [column_mapping.get(col, col) for col in df.columns]
         
         # Convertir l'année en numérique
         if 'annee' in df.columns:
@@ -74,14 +477,16 @@ class DataLoader:
         # Supprimer les lignes avec des valeurs manquantes critiques
         critical_cols = [col for col in ['code_dept', 'annee', 'classe'] if col in df.columns]
         if critical_cols:
-            df = df.dropna(subset=critical_cols)
+            df.dropna(subset=critical_cols, inplace=True)
         
+        # Calculer les faits une fois pour toutes : ils sont stockés dans le Parquet,
+        # les colonnes de mois ne servent plus
+        df = self._add_faits_column(df)
+        df.drop(columns=month_columns(df.columns), inplace=True)
         return df
     
     def _create_demo_data(self) -> pd.DataFrame:
         """Crée des données de démonstration pour les tests."""
-        import numpy as np
-        
         departements = {
             '75': 'Paris', '13': 'Bouches-du-Rhône', '69': 'Rhône',
             '59': 'Nord', '92': 'Hauts-de-Seine', '93': 'Seine-Saint-Denis',
@@ -96,23 +501,48 @@ class DataLoader:
             'Vols de véhicules'
         ]
         
-        data = []
-        for annee in range(2019, 2024):
-            for code_dept, dept_name in departements.items():
-                for classe in classes:
-                    faits = np.random.randint(100, 5000)
-                    data.append({
-                        'code_dept': code_dept,
-                        'departement': dept_name,
-                        'annee': annee,
-                        'classe': classe,
-                        'faits': faits
-                    })
-        
-        return pd.DataFrame(data)
-    
-    @st.cache_data
-    def get_department_stats(_self, df: pd.DataFrame) -> pd.DataFrame:
+        annees = np.arange(2019, 2024)
+        n_depts, n_classes = len(departements), len(classes)
+        
+        # Même ordre que des boucles imbriquées année > département > classe,
+        # une allocation par colonne
+        return pd.DataFrame({
+            'code_dept': np.tile(np.repeat(list(departements), n_classes), len(annees)),
+            'departement': np.tile(np.repeat(list(departements.values()), n_classes), len(annees)),
+            'annee': np.repeat(annees, n_depts * n_classes),
+            'classe': np.tile(classes, len(annees) * n_depts),
+            'faits': np.random.randint(100, 5000, size=len(annees) * n_depts * n_classes)
+        })
+    
+    def get_all_stats(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrège les crimes en un seul passage sur le DataFrame.
+        
+        Le résultat est un cube département x année x type de crime (quelques
+        milliers de lignes au plus) dont dérivent toutes les statistiques
+        ci-dessous, sans relire les données détaillées. Seules les colonnes
+        du cube sont transmises au cache : les colonnes de mois n'entrent
+        pas dans le calcul de la clé.
+        
+        Args:
+            df: DataFrame des crimes
+            
+        Returns:
+            DataFrame agrégé (code_dept, departement, annee, classe, faits, nb_enregistrements)
+        """
+        keys = [col for col in ('code_dept', 'departement', 'annee', 'classe') if col in df.columns]
+        return self._aggregate(df[keys + ['faits']])
+    
+    @st.cache_data(hash_funcs=_DF_HASH)
+    def _aggregate(_self, df: pd.DataFrame) -> pd.DataFrame:
+        """Construit le cube (mis en cache) : somme et nombre de faits par combinaison de clés."""
+        keys = [col for col in df.columns if col != 'faits']
+        return df.groupby(keys, observed=True, sort=False).agg(
+            faits=('faits', 'sum'),
+            nb_enregistrements=('faits', 'size')
+        ).reset_index()
+    
+    def get_department_stats(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Calcule les statistiques par département.
         
@@ -122,26 +552,16 @@ class DataLoader:
         Returns:
             DataFrame avec statistiques agrégées
         """
-        if 'faits' not in df.columns:
-            # Si pas de colonne faits, essayer de trouver les colonnes de mois
-            month_cols = [col for col in df.columns if col.isdigit() or 'mois' in col.lower()]
-            if month_cols:
-                df['faits'] = df[month_cols].sum(axis=1)
-            else:
-                df['faits'] = 1
-        
-        stats = df.groupby(['code_dept', 'departement']).agg({
-            'faits': 'sum',
-            'annee': 'count'
-        }).reset_index()
-        
-        stats.columns = ['code_dept', 'departement', 'total_faits', 'nb_enregistrements']
+        cube = self.get_all_stats(df)
+        stats = cube.groupby(['code_dept', 'departement'], observed=True, sort=False).agg(
+            total_faits=('faits', 'sum'),
+            nb_enregistrements=('nb_enregistrements', 'sum')
+        ).reset_index()
         
         return stats.sort_values('total_faits', ascending=False)
     
-    @st.cache_data
-    def get_temporal_evolution(_self, df: pd.DataFrame, 
-                                dept_code: Optional[str] = None) -> pd.DataFrame:
+    def get_temporal_evolution(self, df: pd.DataFrame, 
+                               dept_code: Optional[str] = None) -> pd.DataFrame:
         """
         Calcule l'évolution temporelle des crimes.
         
@@ -152,28 +572,26 @@ class DataLoader:
         Returns:
             DataFrame avec évolution annuelle
         """
+        cube = self.get_all_stats(df)
         if dept_code:
-            df = df[df['code_dept'] == dept_code]
+            cube = cube[cube['code_dept'] == dept_code]
         
-        if 'faits' not in df.columns:
-            month_cols = [col for col in df.columns if col.isdigit() or 'mois' in col.lower()]
-            if month_cols:
-                df['faits'] = df[month_cols].sum(axis=1)
-            else:
-                df['faits'] = 1
-        
-        evolution = df.groupby('annee')['faits'].sum().reset_index()
+        # sort=True conservé : l'évolution suppose les années dans l'ordre
+        evolution = cube.groupby('annee', observed=True, sort=True)['faits'].sum().reset_index()
         evolution.columns = ['annee', 'total_faits']
         
-        # Calculer l'évolution en pourcentage
-        evolution['evolution_pct'] = evolution['total_faits'].pct_change() * 100
+        # Calculer l'évolution en pourcentage (équivalent de pct_change, en NumPy)
+        totals = evolution['total_faits'].to_numpy(dtype=np.float64)
+        evolution_pct = np.full(len(totals), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            evolution_pct[1:] = (totals[1:] / totals[:-1] - 1.0) * 100.0
+        evolution['evolution_pct'] = evolution_pct
         
         return evolution
     
-    @st.cache_data
-    def get_crime_types_distribution(_self, df: pd.DataFrame, 
-                                      dept_code: Optional[str] = None,
-                                      year: Optional[int] = None) -> pd.DataFrame:
+    def get_crime_types_distribution(self, df: pd.DataFrame, 
+                                     dept_code: Optional[str] = None,
+                                     year: Optional[int] = None) -> pd.DataFrame:
         """
         Calcule la distribution par type de crime.
         
@@ -185,22 +603,18 @@ class DataLoader:
         Returns:
             DataFrame avec distribution par type
         """
-        filtered_df = df.copy()
+        cube = self.get_all_stats(df)
         
+        # Un seul masque combiné pour les deux filtres
+        mask = np.ones(len(cube), dtype=bool)
         if dept_code:
-            filtered_df = filtered_df[filtered_df['code_dept'] == dept_code]
-        
+            mask &= (cube['code_dept'] == dept_code).to_numpy()
         if year:
-            filtered_df = filtered_df[filtered_df['annee'] == year]
+            mask &= (cube['annee'] == year).to_numpy()
+        if not mask.all():
+            cube = cube[mask]
         
-        if 'faits' not in filtered_df.columns:
-            month_cols = [col for col in filtered_df.columns if col.isdigit() or 'mois' in col.lower()]
-            if month_cols:
-                filtered_df['faits'] = filtered_df[month_cols].sum(axis=1)
-            else:
-                filtered_df['faits'] = 1
-        
-        distribution = filtered_df.groupby('classe')['faits'].sum().reset_index()
+        distribution = cube.groupby('classe', observed=True, sort=False)['faits'].sum().reset_index()
         distribution.columns = ['type_crime', 'total']
         distribution = distribution.sort_values('total', ascending=False)
         
@@ -209,8 +623,7 @@ class DataLoader:
         
         return distribution
     
-    @st.cache_data
-    def get_top_departments(_self, df: pd.DataFrame, 
+    def get_top_departments(self, df: pd.DataFrame, 
                             n: int = 10, 
                             year: Optional[int] = None) -> pd.DataFrame:
         """
@@ -224,55 +637,91 @@ class DataLoader:
         Returns:
             DataFrame avec top départements
         """
-        filtered_df = df.copy()
+        cube = self.get_all_stats(df)
         
         if year:
-            filtered_df = filtered_df[filtered_df['annee'] == year]
+            cube = cube[cube['annee'] == year]
         
-        if 'faits' not in filtered_df.columns:
-            month_cols = [col for col in filtered_df.columns if col.isdigit() or 'mois' in col.lower()]
-            if month_cols:
-                filtered_df['faits'] = filtered_df[month_cols].sum(axis=1)
-            else:
-                filtered_df['faits'] = 1
-        
-        top = filtered_df.groupby(['code_dept', 'departement'])['faits'].sum().reset_index()
-        top = top.sort_values('faits', ascending=False).head(n)
-        top.columns = ['code_dept', 'departement', 'total_faits']
+        # Tri partiel : seuls les n plus grands totaux sont ordonnés
+        top = cube.groupby(['code_dept', 'departement'], observed=True, sort=False)['faits'].sum().nlargest(n)
+        top = top.rename('total_faits').reset_index()
         
         return top
 
 
-def load_population_data() -> Dict[str, int]:
+def load_population_data() -> Mapping[str, int]:
     """
     Charge les données de population par département.
     
     Returns:
-        Dictionnaire {code_dept: population}
+        Dictionnaire {code_dept: population} (en lecture seule, non copié)
+    """
+    return _POPULATION
+
+
+@st.cache_resource
+def _population_lookup() -> Tuple[pd.Index, np.ndarray]:
+    """Index des codes département et tableau des populations associées (construits une fois)."""
+    population = load_population_data()
+    return pd.Index(list(population)), np.fromiter(population.values(), dtype=np.float64)
+
+
+def get_population(codes: pd.Series) -> np.ndarray:
+    """
+    Retourne la population de chaque département d'une série de codes.
+    
+    La recherche se fait une fois par catégorie distincte, puis les lignes
+    sont résolues par un simple indexage NumPy sur les codes catégoriels.
+    
+    Args:
+        codes: Série des codes département (catégorielle ou non)
+        
+    Returns:
+        Tableau float64 des populations (NaN si inconnue)
     """
-    # Données de population approximatives (2023)
-    population = {
-        '75': 2165000, '13': 2040000, '69': 1850000, '59': 2608000,
-        '92': 1609000, '93': 1623000, '94': 1395000, '91': 1296000,
-        '78': 1431000, '31': 1380000, '06': 1083000, '44': 1429000,
-        '33': 1623000, '67': 1142000, '62': 1471000, '76': 1254000,
-        '77': 1421000, '95': 1241000, '35': 1079000, '34': 1175000
-    }
+    index, values = _population_lookup()
+    codes = codes.astype('category')
     
-    return population
+    # Position -1 (code inconnu) -> NaN ajouté en fin de tableau
+    positions = index.get_indexer(codes.cat.categories.astype(str))
+    per_category = np.append(values, np.nan)[positions]
+    
+    return np.append(per_category, np.nan)[codes.cat.codes.to_numpy()]
 
 
-def calculate_crime_rate(total_crimes: int, population: int) -> float:
+def crime_rates(stats_df: pd.DataFrame) -> np.ndarray:
+    """
+    Calcule le taux de criminalité pour 1000 habitants de chaque département.
+    
+    Une seule division NumPy pour tous les départements.
+    
+    Args:
+        stats_df: DataFrame avec les colonnes 'code_dept' et 'total_faits'
+        
+    Returns:
+        Tableau float64 des taux (0 si population inconnue ou nulle)
+    """
+    population = np.nan_to_num(get_population(stats_df['code_dept']))
+    return calculate_crime_rate(stats_df['total_faits'].to_numpy(), population)
+
+
+def calculate_crime_rate(total_crimes, population):
     """
     Calcule le taux de criminalité pour 1000 habitants.
     
+    Accepte des scalaires ou des tableaux (calcul vectorisé, sans boucle).
+    
     Args:
-        total_crimes: Nombre total de crimes
-        population: Population du territoire
+        total_crimes: Nombre total de crimes (scalaire ou tableau)
+        population: Population du territoire (scalaire ou tableau)
         
     Returns:
-        Taux pour 1000 habitants
+        Taux pour 1000 habitants (0 si population nulle) : float pour des
+        scalaires, tableau float64 sinon
     """
-    if population == 0:
-        return 0
-    return (total_crimes / population) * 1000
+    total_crimes = np.asarray(total_crimes, dtype=np.float64)
+    population = np.asarray(population, dtype=np.float64)
+    rates = np.zeros(np.broadcast(total_crimes, population).shape)
+    np.divide(total_crimes, population, out=rates, where=population != 0)
+    rates *= 1000.0
+    return rates.item() if rates.ndim == 0 else rates